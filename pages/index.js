@@ -12,14 +12,20 @@ export default function PropertyAlerts() {
   const [showFilters, setShowFilters] = useState(false);
   const [lastScanned, setLastScanned] = useState(null);
   const [stats, setStats] = useState({ total: 0, newToday: 0 });
+  const [marketStats, setMarketStats] = useState(null);
   const [deleteConfirm, setDeleteConfirm] = useState(null);
 
   useEffect(() => {
     loadListings();
+    loadMarketStats();
   }, []);
 
   async function loadListings() {
     try {
+      // Local thumbnails written by scripts/export_thumbnails.py, fetched in parallel
+      const thumbsRequest = fetch('/thumbs/manifest.json')
+        .then(r => (r.ok ? r.json() : null))
+        .catch(() => null);
       const response = await fetch('/data/listings.json');
       if (response.ok) {
         const data = await response.json();
@@ -34,6 +40,11 @@ export default function PropertyAlerts() {
             return savedListing ? { ...listing, favorite: savedListing.favorite } : listing;
           });
         }
+
+        const thumbs = (await thumbsRequest)?.listings || {};
+        listingsData = listingsData.map(listing =>
+          thumbs[listing.id] ? { ...listing, imageUrl: thumbs[listing.id] } : listing
+        );
         
         setListings(listingsData);
         setLastScanned(data.lastScanned);
@@ -44,6 +55,18 @@ export default function PropertyAlerts() {
     }
   }
 
+  // Precomputed by scripts/analytics.py
+  async function loadMarketStats() {
+    try {
+      const response = await fetch('/data/stats.json');
+      if (response.ok) {
+        setMarketStats(await response.json());
+      }
+    } catch (e) {
+      console.error('Failed to load market stats:', e);
+    }
+  }
+
   function calculateStats(listings) {
     const today = new Date().toISOString().split('T')[0];
     const newToday = listings.filter(l => l.dateAdded?.startsWith(today)).length;
@@ -166,6 +189,15 @@ export default function PropertyAlerts() {
           </div>
         </div>
 
+        {/* Market Summary */}
+        {marketStats?.overall?.medianPrice && (
+          <p style={{ margin: '0 0 20px 0', textAlign: 'center', color: '#64748b', fontSize: '13px' }}>
+            Median ${marketStats.overall.medianPrice.toLocaleString()}
+            {marketStats.overall.medianPricePerSqft && ` · $${Math.round(marketStats.overall.medianPricePerSqft)}/sqft`}
+            {marketStats.overall.priceDropRate != null && ` · ${Math.round(marketStats.overall.priceDropRate * 100)}% with price drops`}
+          </p>
+        )}
+
         {/* Filter Toggle */}
         <div style={{ marginBottom: '16px', textAlign: 'center' }}>
           <button
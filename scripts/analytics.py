@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Market analytics over listing history
+Loads listings into NumPy column arrays and precomputes dashboard stats
+(price per sqft, price percentiles by zip and week, inventory, price drops)
+into public/data/stats.json. Requires numpy.
+"""
+
+import argparse
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+import numpy as np
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'data')
+
+PERCENTILES = (25, 50, 75, 90)
+
+# Prices below this are parse errors like "$517K" -> 517 (same cutoff as cleanup_listings.py)
+MIN_PRICE = 10000
+
+SECONDS_PER_DAY = 86400
+
+# Longer forms first so the alternation prefers "Street" over "St"
+STREET_SUFFIXES = [
+    'Street', 'St', 'Avenue', 'Ave', 'Road', 'Rd', 'Boulevard', 'Blvd',
+    'Lane', 'Ln', 'Drive', 'Dr', 'Court', 'Ct', 'Way', 'Circle', 'Cir',
+    'Trail', 'Terrace', 'Ter', 'Place', 'Pl', 'Highway', 'Hwy',
+    'Parkway', 'Pkwy', 'Pike',
+]
+STREET_SUFFIX_PATTERN = '|'.join(STREET_SUFFIXES)
+
+STREET_PATTERN = re.compile(rf'\d+\s+[\w\s]+?\b(?:{STREET_SUFFIX_PATTERN})\b', re.IGNORECASE)
+ZIP_PATTERN = re.compile(r'\b[A-Z]{2}\s+(\d{5})\b')
+
+def parse_timestamp(value):
+    """Convert an ISO emailDate to UTC epoch seconds (NaN if missing)"""
+    if not value:
+        return np.nan
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return np.nan
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+def resolve_zip(listing):
+    """Zip from the listing field, else one parsed from the address text"""
+    if listing.get('zip'):
+        return listing['zip']
+    match = ZIP_PATTERN.search(listing.get('address') or '')
+    return match.group(1) if match else None
+
+def property_key(listing):
+    """
+    Key a listing by street plus zip (or city) so alerts for the same house match
+    and same-named streets in different towns don't. Empty if either part is missing.
+    """
+    address = listing.get('address')
+    if not address:
+        return ''
+    match = STREET_PATTERN.search(address)
+    if not match:
+        return ''
+    location = resolve_zip(listing) or listing.get('city')
+    if not location:
+        return ''
+    street = re.sub(r'\s+', ' ', match.group(0)).strip().lower()
+    return f"{street}|{location.lower()}"
+
+def encode(values):
+    """Factorize a list of strings into (labels, int codes); missing values get code -1"""
+    values = np.array([v if v else '' for v in values], dtype=object)
+    labels, codes = np.unique(values.astype(str), return_inverse=True)
+    if len(labels) and labels[0] == '':
+        labels = labels[1:]
+        codes = codes - 1
+    return labels, codes.astype(np.int64)
+
+def load_columns(listings):
+    """Build column arrays from listing dicts; numeric gaps become NaN"""
+    def numeric(field):
+        return np.array(
+            [l.get(field) if l.get(field) is not None else np.nan for l in listings],
+            dtype=np.float64
+        )
+
+    price = numeric('price')
+    price[price < MIN_PRICE] = np.nan
+    sqft = numeric('sqft')
+    sqft[sqft <= 0] = np.nan
+
+    zip_labels, zip_codes = encode([resolve_zip(l) for l in listings])
+    source_labels, source_codes = encode([l.get('source') for l in listings])
+    property_labels, property_codes = encode([property_key(l) for l in listings])
+
+    return {
+        'price': price,
+        'sqft': sqft,
+        'beds': numeric('beds'),
+        'baths': numeric('baths'),
+        'emailDate': np.array([parse_timestamp(l.get('emailDate')) for l in listings], dtype=np.float64),
+        'zip': zip_codes,
+        'zipLabels': zip_labels,
+        'source': source_codes,
+        'sourceLabels': source_labels,
+        'property': property_codes,
+        'propertyLabels': property_labels,
+    }
+
+def week_codes(timestamps):
+    """Map epoch seconds to the epoch day of that week's Monday (-1 if missing)"""
+    valid = ~np.isnan(timestamps)
+    days = np.zeros(len(timestamps), dtype=np.int64)
+    days[valid] = np.floor(timestamps[valid] / SECONDS_PER_DAY).astype(np.int64)
+    # 1970-01-01 was a Thursday, so shift by 3 to land on Monday
+    mondays = days - (days + 3) % 7
+    mondays[~valid] = -1
+    return mondays
+
+def group_percentiles(groups, values, percentiles=PERCENTILES):
+    """
+    Percentiles of values per group without a Python loop over groups.
+    Returns (group ids, counts, {p: array}) using linear interpolation like np.percentile.
+    """
+    mask = (groups >= 0) & ~np.isnan(values)
+    groups = groups[mask]
+    values = values[mask]
+    if not len(values):
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64), {p: np.array([]) for p in percentiles}
+
+    order = np.lexsort((values, groups))
+    groups = groups[order]
+    values = values[order]
+
+    ids, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    result = {}
+    for p in percentiles:
+        pos = starts + (counts - 1) * (p / 100.0)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.ceil(pos).astype(np.int64)
+        frac = pos - lo
+        result[p] = values[lo] + (values[hi] - values[lo]) * frac
+    return ids, counts, result
+
+def price_drops(columns):
+    """
+    Flag properties whose price fell between consecutive alerts.
+    Returns (property ids, alert counts, boolean dropped per id).
+    """
+    prop = columns['property']
+    price = columns['price']
+    ts = columns['emailDate']
+    mask = (prop >= 0) & ~np.isnan(price) & ~np.isnan(ts)
+    prop, price, ts = prop[mask], price[mask], ts[mask]
+
+    order = np.lexsort((ts, prop))
+    prop, price = prop[order], price[order]
+
+    same = prop[1:] == prop[:-1]
+    drop = same & (price[1:] < price[:-1])
+
+    ids, counts = np.unique(prop, return_counts=True)
+    dropped = np.zeros(prop.max() + 1 if len(prop) else 0, dtype=bool)
+    dropped[prop[1:][drop]] = True
+    return ids, counts, dropped[ids]
+
+def distinct_counts(groups, units, n_groups):
+    """Number of distinct units per group code (rows with group -1 are ignored)"""
+    mask = groups >= 0
+    pairs = np.unique(np.stack([groups[mask], units[mask]]), axis=1)
+    return np.bincount(pairs[0], minlength=n_groups)
+
+def percentile_rows(ids, counts, result, labels):
+    """Turn group_percentiles output into JSON-ready rows keyed by label"""
+    rows = []
+    for i, group in enumerate(ids):
+        row = {'key': labels(group), 'count': int(counts[i])}
+        for p, values in result.items():
+            name = 'median' if p == 50 else f'p{p}'
+            row[name] = round(float(values[i]), 2)
+        rows.append(row)
+    return rows
+
+def compute_stats(columns):
+    """Compute all dashboard aggregates from column arrays"""
+    price = columns['price']
+    sqft = columns['sqft']
+    zips = columns['zip']
+    zip_labels = columns['zipLabels']
+    weeks = week_codes(columns['emailDate'])
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ppsf = price / sqft
+
+    def zip_label(code):
+        return str(zip_labels[code])
+
+    def week_label(day):
+        return datetime.fromtimestamp(int(day) * SECONDS_PER_DAY, tz=timezone.utc).date().isoformat()
+
+    by_zip = percentile_rows(*group_percentiles(zips, price), zip_label)
+    ppsf_ids, _, ppsf_result = group_percentiles(zips, ppsf, (50,))
+    ppsf_by_zip = {zip_label(code): round(float(v), 2) for code, v in zip(ppsf_ids, ppsf_result[50])}
+    for row in by_zip:
+        row['medianPricePerSqft'] = ppsf_by_zip.get(row['key'])
+
+    by_week = percentile_rows(*group_percentiles(weeks, price), week_label)
+
+    # Inventory: distinct properties, not alert emails. Rows without a street key
+    # but with a parsed price count once each; rows with neither (newsletters,
+    # account emails) are skipped.
+    prop = columns['property']
+    listing_rows = (prop >= 0) | ~np.isnan(price)
+    units = np.where(prop >= 0, prop, len(columns['propertyLabels']) + np.arange(len(prop)))[listing_rows]
+    zip_counts = distinct_counts(zips[listing_rows], units, len(zip_labels))
+    source_counts = distinct_counts(columns['source'][listing_rows], units, len(columns['sourceLabels']))
+    inv_weeks = weeks[listing_rows]
+    week_ids, week_index = np.unique(inv_weeks[inv_weeks >= 0], return_inverse=True)
+    week_groups = np.full(len(inv_weeks), -1, dtype=np.int64)
+    week_groups[inv_weeks >= 0] = week_index
+    week_counts = distinct_counts(week_groups, units, len(week_ids))
+
+    prop_ids, prop_counts, dropped = price_drops(columns)
+    property_zip = np.full(len(columns['propertyLabels']), -1, dtype=np.int64)
+    has_zip = (columns['property'] >= 0) & (zips >= 0)
+    property_zip[columns['property'][has_zip]] = zips[has_zip]
+    tracked = prop_counts > 1
+    drop_zip = property_zip[prop_ids[tracked]]
+    drop_known = drop_zip >= 0
+    tracked_by_zip = np.bincount(drop_zip[drop_known], minlength=len(zip_labels))
+    dropped_by_zip = np.bincount(drop_zip[drop_known], weights=dropped[tracked][drop_known], minlength=len(zip_labels))
+
+    valid_ppsf = ppsf[~np.isnan(ppsf)]
+    valid_price = price[~np.isnan(price)]
+    tracked_total = int(tracked.sum())
+
+    return {
+        'generatedAt': datetime.now().isoformat(),
+        'total': int(len(price)),
+        'overall': {
+            'medianPrice': round(float(np.median(valid_price)), 2) if len(valid_price) else None,
+            'medianPricePerSqft': round(float(np.median(valid_ppsf)), 2) if len(valid_ppsf) else None,
+            'trackedProperties': tracked_total,
+            'priceDropRate': round(float(dropped[tracked].sum()) / tracked_total, 4) if tracked_total else None,
+        },
+        'priceByZip': by_zip,
+        'priceByWeek': by_week,
+        'inventory': {
+            'byZip': {zip_label(i): int(c) for i, c in enumerate(zip_counts) if c},
+            'bySource': {str(columns['sourceLabels'][i]): int(c) for i, c in enumerate(source_counts) if c},
+            'byWeek': {week_label(w): int(c) for w, c in zip(week_ids, week_counts)},
+        },
+        'priceDropsByZip': {
+            zip_label(i): {
+                'tracked': int(tracked_by_zip[i]),
+                'dropped': int(dropped_by_zip[i]),
+                'rate': round(float(dropped_by_zip[i]) / tracked_by_zip[i], 4),
+            }
+            for i in np.flatnonzero(tracked_by_zip)
+        },
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute market stats for the dashboard')
+    parser.add_argument('--input', default=os.path.join(DATA_DIR, 'listings.json'),
+                        help='listing history JSON (default: public/data/listings.json)')
+    parser.add_argument('--output', default=os.path.join(DATA_DIR, 'stats.json'),
+                        help='stats file to write (default: public/data/stats.json)')
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as f:
+        data = json.load(f)
+
+    listings = data.get('listings', [])
+    print(f"Loaded {len(listings)} listings")
+
+    stats = compute_stats(load_columns(listings))
+
+    with open(args.output, 'w') as f:
+        json.dump(stats, f, indent=2)
+
+    print(f"Saved stats for {len(stats['priceByZip'])} zips, {len(stats['priceByWeek'])} weeks to {args.output}")
+
+if __name__ == '__main__':
+    main()
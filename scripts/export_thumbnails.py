@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Export listing photos as local thumbnails
+Downloads each listing imageUrl once (bounded concurrency), dedupes by content
+hash, writes resized thumbnails into public/thumbs/ and a manifest mapping
+listing id -> local thumbnail. Fetch/LRU state lives in scripts/.thumbnail_cache.json,
+outside public/ so it is not deployed. Requires Pillow.
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+DATA_FILE = os.path.join(os.path.dirname(__file__), '..', 'public', 'data', 'listings.json')
+THUMB_DIR = os.path.join(os.path.dirname(__file__), '..', 'public', 'thumbs')
+URL_PREFIX = '/thumbs'
+# Public id -> thumbnail map read by the dashboard
+MANIFEST_NAME = 'manifest.json'
+# Fetch validators and LRU bookkeeping; kept out of public/ so it never ships
+CACHE_FILE = os.path.join(os.path.dirname(__file__), '.thumbnail_cache.json')
+
+USER_AGENT = 'Mozilla/5.0 (property-alerts thumbnail export)'
+
+FORMATS = {
+    'webp': ('WEBP', '.webp'),
+    'jpeg': ('JPEG', '.jpg'),
+}
+
+def write_json(path, data, indent=None):
+    """Write JSON atomically so readers never see a partial file"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp_path, path)
+
+def load_cache(cache_file):
+    """Load per-URL and per-file cache state, or an empty cache on first run"""
+    if os.path.exists(cache_file):
+        with open(cache_file, 'r') as f:
+            cache = json.load(f)
+    else:
+        cache = {}
+    cache.setdefault('urls', {})
+    cache.setdefault('files', {})
+    return cache
+
+def save_cache(cache_file, cache):
+    """Save cache state"""
+    write_json(cache_file, cache)
+
+def remove_stale_tmp(thumb_dir):
+    """Delete temp files left in the thumbnail directory by an interrupted run"""
+    for name in os.listdir(thumb_dir):
+        if name.endswith('.tmp'):
+            os.remove(os.path.join(thumb_dir, name))
+
+def save_manifest(thumb_dir, listing_map):
+    """Save the listing id -> thumbnail path map for the dashboard"""
+    write_json(os.path.join(thumb_dir, MANIFEST_NAME), {
+        'listings': listing_map,
+        'updated': datetime.now().isoformat(),
+    }, indent=2)
+
+def fetch_image(url, cached=None, timeout=15):
+    """
+    GET an image, conditionally if we have validators from a previous fetch.
+    Returns (status, body, headers); status is 304 when the cached copy is current.
+    """
+    headers = {'User-Agent': USER_AGENT}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('lastModified'):
+            headers['If-Modified-Since'] = cached['lastModified']
+
+    request = urllib.request.Request(url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, e.headers
+        raise
+
+def make_thumbnail(data, size, fmt):
+    """Resize image bytes to fit within size x size and encode as fmt"""
+    pil_format, _ = FORMATS[fmt]
+    with Image.open(io.BytesIO(data)) as img:
+        img.thumbnail((size, size))
+        if img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        out = io.BytesIO()
+        img.save(out, pil_format, quality=80)
+    return out.getvalue()
+
+def process_url(url, cached, thumb_dir, size, fmt, timeout):
+    """Fetch one URL and make sure its thumbnail exists on disk; returns a url entry"""
+    status, data, headers = fetch_image(url, cached, timeout)
+    if status == 304:
+        return dict(cached, checkedAt=datetime.now().isoformat())
+
+    _, ext = FORMATS[fmt]
+    digest = hashlib.sha256(data).hexdigest()[:20]
+    filename = f"{digest}_{size}{ext}"
+    path = os.path.join(thumb_dir, filename)
+
+    # Same photo behind a different URL (or re-fetched unchanged) - reuse the file
+    if not os.path.exists(path):
+        thumb = make_thumbnail(data, size, fmt)
+        # Per-thread temp name: two URLs with identical bytes may land here at once
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(thumb)
+        os.replace(tmp_path, path)
+
+    return {
+        'file': filename,
+        'size': size,
+        'etag': headers.get('ETag'),
+        'lastModified': headers.get('Last-Modified'),
+        'checkedAt': datetime.now().isoformat(),
+    }
+
+def is_usable(entry, thumb_dir, size, fmt):
+    """True if a cached entry points at an existing thumbnail of the requested size/format"""
+    if not entry or not entry.get('file') or entry.get('size') != size:
+        return False
+    _, ext = FORMATS[fmt]
+    return entry['file'].endswith(ext) and os.path.exists(os.path.join(thumb_dir, entry['file']))
+
+def evict(cache, listing_map, thumb_dir, max_bytes):
+    """Delete least recently used thumbnails until the cache fits in max_bytes"""
+    files = cache['files']
+    total = sum(info['size'] for info in files.values())
+    evicted = set()
+
+    for filename in sorted(files, key=lambda name: files[name]['lastUsed']):
+        if total <= max_bytes:
+            break
+        total -= files[filename]['size']
+        evicted.add(filename)
+        try:
+            os.remove(os.path.join(thumb_dir, filename))
+        except FileNotFoundError:
+            pass
+
+    if evicted:
+        for filename in evicted:
+            del files[filename]
+        cache['urls'] = {u: e for u, e in cache['urls'].items() if e.get('file') not in evicted}
+        evicted_paths = {f"{URL_PREFIX}/{name}" for name in evicted}
+        for listing_id in [i for i, p in listing_map.items() if p in evicted_paths]:
+            del listing_map[listing_id]
+    return evicted
+
+def export_thumbnails(listings, thumb_dir=THUMB_DIR, size=480, fmt='webp', workers=8,
+                      refresh=False, timeout=15, max_bytes=200 * 1024 * 1024,
+                      retry_failed_after=timedelta(hours=24), cache_file=CACHE_FILE):
+    """
+    Bring thumb_dir up to date with the listings' images.
+    Returns (listing id -> thumbnail path, cache state).
+    """
+    os.makedirs(thumb_dir, exist_ok=True)
+    remove_stale_tmp(thumb_dir)
+    cache = load_cache(cache_file)
+    urls = cache['urls']
+    now = datetime.now()
+
+    wanted = {l['imageUrl'] for l in listings if l.get('imageUrl')}
+
+    # Already-downloaded URLs are only re-checked (conditionally) on --refresh;
+    # failed URLs wait out retry_failed_after unless --refresh
+    to_fetch = []
+    skipped = 0
+    for url in sorted(wanted):
+        cached = urls.get(url)
+        if cached and cached.get('failed'):
+            if not refresh and now - datetime.fromisoformat(cached['checkedAt']) < retry_failed_after:
+                skipped += 1
+                continue
+            cached = None
+        elif not is_usable(cached, thumb_dir, size, fmt):
+            cached = None
+        if cached is None or refresh:
+            to_fetch.append((url, cached))
+
+    fetched = failed = unchanged = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (url, cached, pool.submit(process_url, url, cached, thumb_dir, size, fmt, timeout))
+            for url, cached in to_fetch
+        ]
+        for url, cached, future in futures:
+            try:
+                entry = future.result()
+            except Exception as e:
+                print(f"  ✗ {url[:70]}: {e}")
+                failed += 1
+                if cached:
+                    # A refresh hiccup shouldn't discard a thumbnail we already have
+                    urls[url] = dict(cached, checkedAt=datetime.now().isoformat())
+                    continue
+                urls[url] = {
+                    'failed': True,
+                    'status': e.code if isinstance(e, urllib.error.HTTPError) else None,
+                    'error': str(e),
+                    'checkedAt': datetime.now().isoformat(),
+                }
+                continue
+            if cached and cached['file'] == entry['file']:
+                unchanged += 1
+            else:
+                fetched += 1
+            urls[url] = entry
+
+    used_at = datetime.now().isoformat()
+    files = cache['files']
+    listing_map = {}
+    for listing in listings:
+        entry = urls.get(listing.get('imageUrl'))
+        if not listing.get('id') or not is_usable(entry, thumb_dir, size, fmt):
+            continue
+        path = os.path.join(thumb_dir, entry['file'])
+        listing_map[listing['id']] = f"{URL_PREFIX}/{entry['file']}"
+        files[entry['file']] = {'size': os.path.getsize(path), 'lastUsed': used_at}
+
+    evicted = evict(cache, listing_map, thumb_dir, max_bytes)
+
+    print(f"Thumbnails: {fetched} new, {unchanged} unchanged, {failed} failed, "
+          f"{skipped} skipped (failed recently), {len(evicted)} evicted")
+    return listing_map, cache
+
+def main():
+    parser = argparse.ArgumentParser(description='Download listing photos and write local thumbnails')
+    parser.add_argument('--input', default=DATA_FILE,
+                        help='listings JSON (default: public/data/listings.json)')
+    parser.add_argument('--output-dir', default=THUMB_DIR,
+                        help='thumbnail directory (default: public/thumbs)')
+    parser.add_argument('--size', type=int, default=480, help='max thumbnail edge in pixels')
+    parser.add_argument('--format', choices=sorted(FORMATS), default='webp')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent downloads')
+    parser.add_argument('--timeout', type=float, default=15, help='per-request timeout in seconds')
+    parser.add_argument('--max-cache-mb', type=float, default=200,
+                        help='evict least recently used thumbnails above this size')
+    parser.add_argument('--refresh', action='store_true',
+                        help='re-check cached images with conditional requests and retry failures')
+    parser.add_argument('--cache-file', default=CACHE_FILE,
+                        help='fetch/LRU state file (default: scripts/.thumbnail_cache.json)')
+    parser.add_argument('--retry-failed-hours', type=float, default=24,
+                        help='wait this long before retrying a URL that failed')
+    args = parser.parse_args()
+
+    with open(args.input, 'r') as f:
+        listings = json.load(f).get('listings', [])
+    print(f"Exporting thumbnails for {len(listings)} listings")
+
+    listing_map, cache = export_thumbnails(
+        listings,
+        thumb_dir=args.output_dir,
+        size=args.size,
+        fmt=args.format,
+        workers=args.workers,
+        refresh=args.refresh,
+        timeout=args.timeout,
+        max_bytes=int(args.max_cache_mb * 1024 * 1024),
+        retry_failed_after=timedelta(hours=args.retry_failed_hours),
+        cache_file=args.cache_file,
+    )
+    save_cache(args.cache_file, cache)
+    save_manifest(args.output_dir, listing_map)
+
+    print(f"Saved manifest with {len(listing_map)} listings to {args.output_dir}")
+
+if __name__ == '__main__':
+    main()
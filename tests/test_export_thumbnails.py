@@ -0,0 +1,176 @@
+"""
+Thumbnail export against a local http.server stand-in for the listing CDNs
+"""
+
+import functools
+import os
+import sys
+import threading
+from datetime import timedelta
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+import export_thumbnails  # noqa: E402
+
+
+class StandInHandler(SimpleHTTPRequestHandler):
+    """Static file server that records (path, status) and can be told to fail paths"""
+
+    def do_GET(self):
+        if self.path in self.server.fail_paths:
+            self.send_error(500)
+            return
+        super().do_GET()
+
+    def log_request(self, code='-', size='-'):
+        self.server.requests.append((self.path, int(code)))
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path):
+    root = tmp_path / 'cdn'
+    root.mkdir()
+    Image.new('RGB', (1600, 1200), (200, 10, 10)).save(root / 'a.jpg')
+    (root / 'dup.jpg').write_bytes((root / 'a.jpg').read_bytes())
+    Image.new('RGBA', (900, 900), (0, 0, 255, 100)).save(root / 'b.png')
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(StandInHandler, directory=str(root)))
+    httpd.requests = []
+    httpd.fail_paths = set()
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.base_url = f"http://127.0.0.1:{httpd.server_address[1]}"
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_listings(server, *names):
+    return [{'id': name, 'imageUrl': f"{server.base_url}/{name}"} for name in names]
+
+
+def run(tmp_path, listings, **kwargs):
+    kwargs.setdefault('workers', 2)
+    return export_thumbnails.export_thumbnails(
+        listings,
+        thumb_dir=str(tmp_path / 'thumbs'),
+        cache_file=str(tmp_path / 'cache.json'),
+        **kwargs,
+    )
+
+
+def run_and_save(tmp_path, listings, **kwargs):
+    listing_map, cache = run(tmp_path, listings, **kwargs)
+    export_thumbnails.save_cache(str(tmp_path / 'cache.json'), cache)
+    return listing_map, cache
+
+
+def requests_for(server, path):
+    return [status for p, status in server.requests if p == path]
+
+
+def thumb_files(tmp_path):
+    return sorted(name for name in os.listdir(tmp_path / 'thumbs') if not name.endswith('.json'))
+
+
+def test_first_fetch_writes_resized_thumbnails(server, tmp_path):
+    listing_map, _ = run_and_save(tmp_path, make_listings(server, 'a.jpg', 'b.png'), size=200)
+
+    assert set(listing_map) == {'a.jpg', 'b.png'}
+    for path in listing_map.values():
+        assert path.startswith('/thumbs/') and path.endswith('_200.webp')
+        with Image.open(tmp_path / 'thumbs' / os.path.basename(path)) as img:
+            assert max(img.size) == 200
+
+
+def test_identical_images_share_one_file(server, tmp_path):
+    listing_map, _ = run_and_save(tmp_path, make_listings(server, 'a.jpg', 'dup.jpg'))
+
+    assert listing_map['a.jpg'] == listing_map['dup.jpg']
+    assert len(thumb_files(tmp_path)) == 1
+
+
+def test_cached_urls_are_not_refetched(server, tmp_path):
+    listings = make_listings(server, 'a.jpg')
+    run_and_save(tmp_path, listings)
+    run_and_save(tmp_path, listings)
+
+    assert requests_for(server, '/a.jpg') == [200]
+
+
+def test_refresh_sends_conditional_request(server, tmp_path):
+    listings = make_listings(server, 'a.jpg')
+    first, _ = run_and_save(tmp_path, listings)
+    second, _ = run_and_save(tmp_path, listings, refresh=True)
+
+    assert requests_for(server, '/a.jpg') == [200, 304]
+    assert second == first
+
+
+def test_failed_url_is_backed_off(server, tmp_path):
+    listings = make_listings(server, 'missing.jpg')
+    run_and_save(tmp_path, listings)
+    listing_map, cache = run_and_save(tmp_path, listings)
+
+    assert listing_map == {}
+    assert requests_for(server, '/missing.jpg') == [404]
+    assert cache['urls'][listings[0]['imageUrl']]['status'] == 404
+
+    run_and_save(tmp_path, listings, retry_failed_after=timedelta(0))
+    run_and_save(tmp_path, listings, refresh=True)
+    assert requests_for(server, '/missing.jpg') == [404, 404, 404]
+
+
+def test_refresh_error_keeps_existing_thumbnail(server, tmp_path):
+    listings = make_listings(server, 'a.jpg')
+    first, _ = run_and_save(tmp_path, listings)
+
+    server.fail_paths.add('/a.jpg')
+    during, _ = run_and_save(tmp_path, listings, refresh=True)
+    server.fail_paths.clear()
+    after, _ = run_and_save(tmp_path, listings)
+
+    assert during == first
+    assert after == first
+    assert requests_for(server, '/a.jpg') == [200, 500]
+
+
+def test_size_change_regenerates(server, tmp_path):
+    listings = make_listings(server, 'a.jpg')
+    small, _ = run_and_save(tmp_path, listings, size=100)
+    large, _ = run_and_save(tmp_path, listings, size=300)
+
+    assert small['a.jpg'] != large['a.jpg']
+    assert large['a.jpg'].endswith('_300.webp')
+
+
+def test_eviction_drops_least_recently_used(server, tmp_path):
+    run_and_save(tmp_path, make_listings(server, 'b.png'))
+    listing_map, cache = run_and_save(tmp_path, make_listings(server, 'a.jpg'))
+    a_file = os.path.basename(listing_map['a.jpg'])
+
+    # Room for the thumbnail just used, not for the older one
+    listing_map, cache = run_and_save(
+        tmp_path, make_listings(server, 'a.jpg'), max_bytes=cache['files'][a_file]['size']
+    )
+    assert thumb_files(tmp_path) == [a_file]
+    assert list(cache['files']) == [a_file]
+
+    listing_map, cache = run_and_save(tmp_path, make_listings(server, 'a.jpg'), max_bytes=1)
+    assert listing_map == {}
+    assert thumb_files(tmp_path) == []
+    assert cache['files'] == {}
+
+
+def test_listing_without_id_is_skipped(server, tmp_path):
+    listings = make_listings(server, 'a.jpg') + [{'imageUrl': f"{server.base_url}/b.png"}]
+    listing_map, _ = run_and_save(tmp_path, listings)
+
+    assert list(listing_map) == ['a.jpg']